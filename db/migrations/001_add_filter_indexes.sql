@@ -0,0 +1,6 @@
+-- Index backing the lookback filter in fetch_raw_data.
+-- Events is filtered on event_date (range); event_type is included so the
+-- index also covers the funnel's per-stage reads.
+-- Users is not filtered, so it needs no index for this.
+
+CREATE INDEX idx_events_date_type ON Events (event_date, event_type);
@@ -1,9 +1,16 @@
+import hashlib
+import io
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
+import plotly.graph_objects as go
+from datetime import timedelta
 
-from data_processing import run_all_metrics, run_all_metrics_from_csv
+from data_processing import (
+    encode_labels, load_data, load_data_from_csv,
+    get_funnel, get_revenue, get_cohort, get_weekly_growth, get_plan_metrics, get_source_metrics,
+)
 
 # -------------------------------
 # Page config & theme
@@ -19,6 +26,38 @@ st.markdown(
 )
 st.title("🚀 SaaS Funnel & Conversion Dashboard")
 
+# -------------------------------
+# Cached CSV loader
+# -------------------------------
+# Explicit Arrow dtypes and date columns so read_csv does no inference or second parse.
+# Label columns are encoded afterwards by encode_labels (read_csv cannot parse into them).
+CSV_READ_OPTIONS = {
+    'users': {'dtype': {'user_id': 'int32[pyarrow]', 'plan_id': 'int16[pyarrow]', 'source_id': 'int16[pyarrow]'},
+              'parse_dates': ['signup_date']},
+    'events': {'dtype': {'user_id': 'int32[pyarrow]'}, 'parse_dates': ['event_date']},
+    'plans': {'dtype': {'plan_id': 'int16[pyarrow]'}},
+    'sources': {'dtype': {'source_id': 'int16[pyarrow]'}},
+}
+
+def read_csv_typed(table, file_bytes):
+    """Read one uploaded CSV with its CSV_READ_OPTIONS"""
+    df = pd.read_csv(io.BytesIO(file_bytes), dtype_backend='pyarrow', **CSV_READ_OPTIONS[table])
+    # parse_dates leaves the whole column as strings if any cell fails to parse (or it is empty),
+    # so fall back to coercing: unparseable cells become NaT instead of breaking the metrics
+    for col in CSV_READ_OPTIONS[table].get('parse_dates', []):
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+@st.cache_data
+def load_csvs(file_bytes_dict):
+    """
+    Parse uploaded CSVs, keyed on their raw bytes so reruns skip re-parsing.
+    Also returns a digest of the bytes, which keys the metric caches for this upload.
+    """
+    digest = tuple(hashlib.sha1(file_bytes_dict[k]).hexdigest() for k in sorted(file_bytes_dict))
+    return encode_labels({k: read_csv_typed(k, v) for k, v in file_bytes_dict.items()}), digest
+
 # -------------------------------
 # Sidebar: Choose data source
 # -------------------------------
@@ -41,8 +80,9 @@ if data_source == "Upload CSV":
 # -------------------------------
 lookback_days = st.sidebar.selectbox(
     "Lookback Period (Days)",
-    options=[7, 14, 30, 60, 90, 180, 365],
-    index=2
+    options=[7, 14, 30, 60, 90, 180, 365, None],
+    index=2,
+    format_func=lambda days: "All time" if days is None else str(days)
 )
 event_options = st.sidebar.multiselect(
     "Event Types",
@@ -51,32 +91,22 @@ event_options = st.sidebar.multiselect(
 )
 
 # -------------------------------
-# Fetch metrics
+# Load data (metrics are computed per tab below)
 # -------------------------------
-with st.spinner("Fetching metrics..."):
+with st.spinner("Fetching data..."):
     if data_source == "MySQL":
-        results = run_all_metrics()
+        data = load_data(lookback_days)
     else:
         # Check if all files uploaded
         if all(uploaded_data.values()):
             # Read CSVs into DataFrames
-            df_dict = {k: pd.read_csv(v) for k, v in uploaded_data.items()}
-            results = run_all_metrics_from_csv(df_dict)
+            df_dict, csv_digest = load_csvs({k: v.getvalue() for k, v in uploaded_data.items()})
+            data = load_data_from_csv(df_dict, lookback_days, source_key=csv_digest)
         else:
             st.warning("Please upload all required CSV files.")
             st.stop()
 
-# -------------------------------
-# Apply lookback filter
-# -------------------------------
-cutoff_date = datetime.utcnow() - timedelta(days=lookback_days)
-
-funnel_df = results['funnel'].loc[results['funnel'].index.isin(event_options)]
-weekly_growth_df = results['weekly_growth'][results['weekly_growth']['week_start'] >= cutoff_date].copy()
-cohort_df = results['cohort'].copy()
-revenue = results['revenue']
-plan_metrics_df = results['plan_metrics']
-source_metrics_df = results['source_metrics']
+cutoff_date = None if lookback_days is None else data['as_of'] - timedelta(days=lookback_days)
 
 # -------------------------------
 # Tabs for metrics
@@ -88,17 +118,23 @@ tabs = st.tabs(["Funnel", "Revenue", "Cohort Retention", "Weekly Growth", "Plan
 # -------------------------------
 with tabs[0]:
     st.subheader("📊 Funnel Conversion")
-    funnel_fig = px.bar(
-        funnel_df.reset_index(),
-        x='stage',
-        y='users',
-        text='users',
+    funnel_df = get_funnel(data['key'], data)
+    funnel_df = funnel_df.loc[funnel_df.index.isin(event_options)]
+    # Numeric columns go in as numpy arrays so Plotly ships them as base64 typed arrays
+    funnel_users = funnel_df['users'].to_numpy(dtype=np.int32)
+    funnel_fig = go.Figure(go.Bar(
+        x=funnel_df.index.astype(str).to_numpy(),
+        y=funnel_users,
+        text=funnel_users,
+        marker_color='#ff6600'
+    ))
+    funnel_fig.update_layout(
         title="Funnel Stages",
-        labels={'users': 'Number of Users', 'stage': 'Stage'},
+        xaxis_title="Stage",
+        yaxis_title="Number of Users",
         height=400,
-        color_discrete_sequence=['#ff6600']
+        plot_bgcolor='#1e1e1e', paper_bgcolor='#1e1e1e', font_color='white'
     )
-    funnel_fig.update_layout(plot_bgcolor='#1e1e1e', paper_bgcolor='#1e1e1e', font_color='white')
     funnel_fig.update_traces(textposition='outside')
     st.plotly_chart(funnel_fig, use_container_width=True)
     st.download_button("Download Funnel Data", funnel_df.reset_index().to_csv(), "funnel.csv")
@@ -108,6 +144,7 @@ with tabs[0]:
 # -------------------------------
 with tabs[1]:
     st.subheader("💰 Revenue Metrics")
+    revenue = get_revenue(data['key'], data)
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Paid Users", revenue['paid_count'])
     col2.metric("MRR ($)", revenue['mrr'])
@@ -120,14 +157,16 @@ with tabs[1]:
 # -------------------------------
 with tabs[2]:
     st.subheader("🧩 Cohort Retention (%)")
+    cohort_df = get_cohort(data['key'], data)
     if not cohort_df.empty:
         cohort_fig = px.imshow(
-            cohort_df.values,
+            cohort_df.to_numpy(dtype=np.float32),
             labels=dict(x="Week Since Signup", y="Cohort Start Week", color="Retention %"),
             x=[str(c) for c in cohort_df.columns],
             y=[str(c.date()) for c in cohort_df.index],
             color_continuous_scale=px.colors.sequential.Oranges,
         )
+        cohort_fig.update_traces(zhoverformat='.2f')
         cohort_fig.update_layout(plot_bgcolor='#1e1e1e', paper_bgcolor='#1e1e1e', font_color='white')
         st.plotly_chart(cohort_fig, use_container_width=True)
         st.download_button("Download Cohort Data", cohort_df.to_csv(), "cohort.csv")
@@ -139,17 +178,24 @@ with tabs[2]:
 # -------------------------------
 with tabs[3]:
     st.subheader("📈 Weekly Growth")
-    weekly_fig = px.line(
-        weekly_growth_df,
-        x='week_start',
-        y='value',
-        text='pct_change',
-        title=f"Weekly Signups Growth - Last {lookback_days} Days",
-        labels={'week_start': 'Week Start', 'value': 'Signups'},
-        height=400
+    weekly_growth_df = get_weekly_growth(data['key'], data)
+    if cutoff_date is not None:
+        weekly_growth_df = weekly_growth_df[weekly_growth_df['week_start'] >= cutoff_date]
+    weekly_fig = go.Figure(go.Scatter(
+        x=weekly_growth_df['week_start'].to_numpy(),
+        y=weekly_growth_df['value'].to_numpy(dtype=np.float32),
+        text=weekly_growth_df['pct_change'].to_numpy(),
+        mode='lines+markers+text',
+        textposition='top center',
+        line_color='#ff6600'
+    ))
+    weekly_fig.update_layout(
+        title="Weekly Signups Growth - " + ("All Time" if lookback_days is None else f"Last {lookback_days} Days"),
+        xaxis_title="Week Start",
+        yaxis_title="Signups",
+        height=400,
+        plot_bgcolor='#1e1e1e', paper_bgcolor='#1e1e1e', font_color='white'
     )
-    weekly_fig.update_traces(mode='lines+markers+text', textposition='top center', line_color='#ff6600')
-    weekly_fig.update_layout(plot_bgcolor='#1e1e1e', paper_bgcolor='#1e1e1e', font_color='white')
     st.plotly_chart(weekly_fig, use_container_width=True)
     st.download_button("Download Weekly Growth Data", weekly_growth_df.to_csv(), "weekly_growth.csv")
 
@@ -158,6 +204,7 @@ with tabs[3]:
 # -------------------------------
 with tabs[4]:
     st.subheader("📊 Plan Metrics")
+    plan_metrics_df = get_plan_metrics(data['key'], data)
     st.dataframe(plan_metrics_df.style.format({"mrr": "{:.2f}", "avg_revenue_per_user": "{:.2f}"}))
     st.download_button("Download Plan Metrics", plan_metrics_df.to_csv(), "plan_metrics.csv")
 
@@ -166,5 +213,6 @@ with tabs[4]:
 # -------------------------------
 with tabs[5]:
     st.subheader("🌐 Traffic Source Metrics")
+    source_metrics_df = get_source_metrics(data['key'], data)
     st.dataframe(source_metrics_df)
     st.download_button("Download Source Metrics", source_metrics_df.to_csv(), "source_metrics.csv")
@@ -9,40 +9,125 @@ Fetches SaaS funnel data from MySQL and computes:
 - Plan-wise metrics
 - Traffic source metrics
 
-Uses raw SQL + pandas + python-dateutil parser
+Uses raw SQL + pandas + python-dateutil parser; the heavy
+event groupbys run in Polars with pandas kept at the I/O boundary
 """
 
 import logging
+import connectorx as cx
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
+import numpy as np
 import pandas as pd
+import polars as pl
+import pyarrow as pa
+import streamlit as st
 from datetime import datetime, timedelta
 from dateutil import parser
 
-from db_connection import create_connection, close_connection
+from db_connection import get_db_uri
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Arrow dictionary-encoded strings for low-cardinality label columns
+ARROW_LABEL_DTYPE = pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string()))
+# event_type is only grouped in Polars. plan_name / source_name are pandas groupby keys,
+# and pandas ignores observed=True for Arrow dictionaries, so those stay numpy categoricals
+LABEL_COLUMNS = {
+    'events': ('event_type', ARROW_LABEL_DTYPE),
+    'plans': ('plan_name', 'category'),
+    'sources': ('source_name', 'category'),
+}
+
+def encode_labels(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Convert the label columns of the raw tables to their LABEL_COLUMNS dtype, in place"""
+    for table, (column, dtype) in LABEL_COLUMNS.items():
+        raw[table][column] = raw[table][column].astype(dtype)
+    return raw
+
+def today_utc() -> datetime:
+    """Start of the current UTC day: the as-of date for lookback and time-window metrics"""
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
 # -----------------------------
 # Fetch raw data
 # -----------------------------
-def fetch_raw_data(conn) -> Dict[str, pd.DataFrame]:
-    """Fetch core tables from MySQL"""
+def _arrow_to_pandas_dtype(arrow_type: pa.DataType):
+    """Keep columns Arrow-backed, except timestamps which stay numpy datetime64 like the CSV path"""
+    return None if pa.types.is_timestamp(arrow_type) else pd.ArrowDtype(arrow_type)
+
+def _read_sql_arrow(uri: str, sql: str) -> pd.DataFrame:
+    """Run one query through connectorx, which streams rows straight into Arrow buffers"""
+    table = cx.read_sql(uri, sql, return_type="arrow")
+    # DECIMAL columns (Plans.price) arrive as decimal128; read them as float64 like the CSV path
+    table = table.cast(pa.schema([
+        field.with_type(pa.float64()) if pa.types.is_decimal(field.type) else field
+        for field in table.schema
+    ]))
+    return table.to_pandas(types_mapper=_arrow_to_pandas_dtype)
+
+def fetch_raw_data(uri: str,
+                   lookback_days: Optional[int] = None,
+                   as_of_date: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch core tables from MySQL via connectorx (cached by load_data).
+    The lookback filter is applied to Events in SQL so only the window is shipped. Users
+    are not filtered: a user who signed up before the window can still be active or pay
+    inside it. Event types are not filtered either: the funnel needs every stage, the
+    event filter is display-only.
+    The four queries run concurrently, each on its own connection.
+    """
     logger.info("Fetching raw data from DB...")
-    users = pd.read_sql("SELECT * FROM Users;", conn)
-    events = pd.read_sql("SELECT * FROM Events;", conn)
-    plans = pd.read_sql("SELECT * FROM Plans;", conn)
-    sources = pd.read_sql("SELECT * FROM Sources;", conn)
-
-    # Convert dates
-    if 'signup_date' in users.columns:
-        users['signup_date'] = pd.to_datetime(users['signup_date'])
-    if 'event_date' in events.columns:
-        events['event_date'] = pd.to_datetime(events['event_date'])
+    users_sql = "SELECT user_id, signup_date, plan_id, source_id FROM Users"
+    events_sql = "SELECT user_id, event_type, event_date FROM Events"
+
+    # connectorx has no parameter binding, so the cutoff is formatted before inlining
+    if lookback_days is not None:
+        cutoff = ((as_of_date or today_utc()) - timedelta(days=int(lookback_days))).strftime('%Y-%m-%d %H:%M:%S')
+        events_sql += f" WHERE event_date >= '{cutoff}'"
+
+    queries = {
+        'users': users_sql,
+        'events': events_sql,
+        'plans': "SELECT * FROM Plans",
+        'sources': "SELECT * FROM Sources",
+    }
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {name: executor.submit(_read_sql_arrow, uri, sql) for name, sql in queries.items()}
+        users, events, plans, sources = (futures[name].result() for name in queries)
 
     logger.info("Fetched: %d users, %d events", len(users), len(events))
-    return {'users': users, 'events': events, 'plans': plans, 'sources': sources}
+    return encode_labels({'users': users, 'events': events, 'plans': plans, 'sources': sources})
+
+def filter_raw_data(users: pd.DataFrame,
+                    events: pd.DataFrame,
+                    lookback_days: Optional[int] = None,
+                    as_of_date: Optional[datetime] = None):
+    """Apply the same lookback filter as fetch_raw_data, in pandas (events only)"""
+    if lookback_days is not None:
+        cutoff = (as_of_date or today_utc()) - timedelta(days=lookback_days)
+        events = events[events['event_date'] >= cutoff]
+    return users, events
+
+# -----------------------------
+# Shared event slices
+# -----------------------------
+def _prepare_events(events_df: pd.DataFrame) -> Dict[str, object]:
+    """
+    Slice the paid and signup events (and the distinct paying user ids) once per load,
+    so the revenue, plan, source and weekly metrics are not re-filtered per metric.
+    Only those two types are copied out; funnel and cohort read the full events frame.
+    """
+    event_type = events_df['event_type']
+    paid_events = events_df[event_type == 'paid']
+    return {
+        'events': events_df,
+        'paid_events': paid_events,
+        'paid_user_ids': paid_events['user_id'].drop_duplicates(),
+        'signup_events': events_df[event_type == 'signup'],
+    }
 
 # -----------------------------
 # Funnel metrics
@@ -51,36 +136,56 @@ def compute_funnel(events_df: pd.DataFrame, stages: Optional[list] = None) -> pd
     if stages is None:
         stages = ['visit', 'signup', 'trial', 'paid']
 
-    counts = events_df.groupby('event_type')['user_id'].nunique().reindex(stages).fillna(0).astype(int)
+    counts = (
+        pl.from_pandas(events_df[['event_type', 'user_id']])
+        .unique()
+        .group_by('event_type')
+        .len(name='users')
+        .to_pandas()
+        .set_index('event_type')['users']
+        .reindex(stages).fillna(0).astype(int)
+    )
     df = pd.DataFrame({'users': counts})
     start = df['users'].iloc[0] if len(df) > 0 else 0
     df['conversion_from_start_pct'] = (df['users'] / (start if start > 0 else 1) * 100).round(2)
-    df['conversion_from_prev_pct'] = df['users'].pct_change().fillna(1).apply(lambda x: round(x * 100 if x != 1 else 100, 2))
+    pct = df['users'].pct_change()
+    df['conversion_from_prev_pct'] = np.where(pct.isna(), 100.0, (pct * 100).round(2))
     df['drop_off_pct_from_prev'] = (100 - df['conversion_from_prev_pct']).round(2)
     df.index.name = 'stage'
     return df
 
+# -----------------------------
+# Paid users
+# -----------------------------
+def compute_paid_users(users_df: pd.DataFrame, paid_user_ids: pd.Series) -> pd.DataFrame:
+    """Users with at least one paid event, one row per user (shared by revenue/plan/source metrics)"""
+    return users_df.merge(paid_user_ids.to_frame(), on='user_id')
+
 # -----------------------------
 # Revenue metrics
 # -----------------------------
 def compute_revenue_metrics(users_df: pd.DataFrame,
-                            events_df: pd.DataFrame,
+                            paid_events: pd.DataFrame,
                             plans_df: pd.DataFrame,
+                            paid_users_df: pd.DataFrame,
                             as_of_date: Optional[datetime] = None) -> Dict[str, float]:
     if as_of_date is None:
         as_of_date = datetime.utcnow()
 
-    paid_events = events_df[events_df['event_type'] == 'paid'].copy()
-    paid_users = paid_events['user_id'].unique()
-    paid_count = len(paid_users)
+    # Same population as recent_paid below, so the 30-day count is always a subset.
+    # paid_users_df is these ids joined to Users, so MRR/ARPU cover the same users
+    # (paid_count == len(paid_users_df)) as long as every paying user_id exists in Users.
+    paid_count = paid_events['user_id'].nunique()
+    if paid_count != len(paid_users_df):
+        logger.warning("%d paid user ids are missing from Users", paid_count - len(paid_users_df))
 
-    merged = users_df[users_df['user_id'].isin(paid_users)].merge(plans_df, on='plan_id', how='left')
-    mrr = merged['price'].sum() if 'price' in merged.columns else 0.0
+    merged = paid_users_df[['user_id', 'plan_id']].merge(plans_df[['plan_id', 'price']], on='plan_id', how='left', sort=False)
+    mrr = merged['price'].sum()
     arpu = (mrr / len(users_df)) if len(users_df) > 0 else 0.0
     avg_rev_per_paid = merged['price'].mean() if len(merged) > 0 else 0.0
 
     last_30 = as_of_date - timedelta(days=30)
-    recent_paid = paid_events[paid_events['event_date'] >= last_30]['user_id'].nunique()
+    recent_paid = paid_events.loc[paid_events['event_date'] >= last_30, 'user_id'].nunique()
     churn_rate = 100 * (1 - (recent_paid / paid_count)) if paid_count > 0 else 0.0
 
     return {
@@ -94,158 +199,224 @@ def compute_revenue_metrics(users_df: pd.DataFrame,
 # -----------------------------
 # Cohort retention
 # -----------------------------
-def compute_cohort_retention(users_df: pd.DataFrame, events_df: pd.DataFrame, cohort_by: str = 'week') -> pd.DataFrame:
-    df_users = users_df[['user_id', 'signup_date']].copy()
+def _cohort_pivot(users_df: pd.DataFrame, events_df: pd.DataFrame, cohort_by: str = 'week') -> pd.DataFrame:
+    """Distinct active users per (cohort, period_number), pivoted wide"""
     if cohort_by == 'week':
-        df_users['cohort'] = df_users['signup_date'].dt.to_period('W').apply(lambda r: r.start_time)
+        cohort = pl.col('signup_date').dt.truncate('1w')
     elif cohort_by == 'month':
-        df_users['cohort'] = df_users['signup_date'].dt.to_period('M').apply(lambda r: r.start_time)
+        cohort = pl.col('signup_date').dt.truncate('1mo')
     else:
         raise ValueError("cohort_by must be 'week' or 'month'")
 
-    df_events = events_df[['user_id', 'event_date']].copy()
-    merged = df_events.merge(df_users, on='user_id', how='inner')
-    merged['period_number'] = ((merged['event_date'] - merged['signup_date']).dt.days // 7).astype(int)
+    df_users = pl.from_pandas(users_df[['user_id', 'signup_date']]).with_columns(cohort.alias('cohort'))
+    df_events = pl.from_pandas(events_df[['user_id', 'event_date']])
+    # Unparseable dates arrive as NaT and have no period, so they are left out of the pivot
+    merged = df_events.join(df_users, on='user_id', how='inner').drop_nulls(['event_date', 'signup_date']).with_columns(
+        ((pl.col('event_date') - pl.col('signup_date')).dt.total_seconds() // (7 * 24 * 3600)).alias('period_number')
+    )
 
-    if merged.empty:
-        logger.warning("No data available for cohort calculation.")
+    if merged.is_empty():
         return pd.DataFrame()
 
+    # Fused groupby + pivot: one n_unique-aggregating pivot instead of groupby -> reset_index -> pivot
     cohort_pivot = (
-        merged.groupby(['cohort', 'period_number'])['user_id']
-        .nunique()
-        .reset_index()
-        .pivot(index='cohort', columns='period_number', values='user_id')
-    ).fillna(0)
-
+        merged.pivot(on='period_number', index='cohort', values='user_id',
+                     aggregate_function=pl.element().n_unique(), sort_columns=True)
+        .sort('cohort')
+        .to_pandas()
+        .set_index('cohort')
+        .rename(columns=int)
+        .fillna(0)
+    )
+    cohort_pivot.columns.name = 'period_number'
+    return cohort_pivot
+
+def _cohort_retention_from_pivot(cohort_pivot: pd.DataFrame) -> pd.DataFrame:
+    """Retention % of each cohort relative to its first period"""
     cohort_sizes = cohort_pivot.iloc[:, 0]
-    retention = cohort_pivot.divide(cohort_sizes, axis=0).multiply(100).round(2)
-    return retention
+    return cohort_pivot.divide(cohort_sizes, axis=0).multiply(100).round(2)
+
+def compute_cohort_retention(users_df: pd.DataFrame, events_df: pd.DataFrame, cohort_by: str = 'week') -> pd.DataFrame:
+    if cohort_by not in ('week', 'month'):
+        raise ValueError("cohort_by must be 'week' or 'month'")
+
+    cohort_pivot = _cohort_pivot(users_df[['user_id', 'signup_date']], events_df[['user_id', 'event_date']], cohort_by)
+    if cohort_pivot.empty:
+        logger.warning("No data available for cohort calculation.")
+        return cohort_pivot
+    return _cohort_retention_from_pivot(cohort_pivot)
 
 # -----------------------------
 # Weekly growth
 # -----------------------------
-def compute_weekly_growth(users_df: pd.DataFrame, events_df: pd.DataFrame, metric: str = 'signups', weeks: int = 12) -> pd.DataFrame:
-    now = datetime.utcnow()
-    start = now - timedelta(weeks=weeks)
+def compute_weekly_growth(users_df: pd.DataFrame, events_df: pd.DataFrame, metric: str = 'signups', weeks: int = 12,
+                          as_of_date: Optional[datetime] = None) -> pd.DataFrame:
+    if as_of_date is None:
+        as_of_date = datetime.utcnow()
+    start = as_of_date - timedelta(weeks=weeks)
     metric_map = {'signups': 'signup', 'visits': 'visit', 'trials': 'trial', 'paid': 'paid'}
 
-    if metric == 'active_users':
-        events = events_df[events_df['event_date'] >= start].copy()
-        events['week'] = events['event_date'].dt.to_period('W').apply(lambda r: r.start_time)
-        series = events.groupby('week')['user_id'].nunique().rename('value')
-    else:
+    events = pl.from_pandas(events_df[['user_id', 'event_type', 'event_date']]).filter(pl.col('event_date') >= start)
+    if metric != 'active_users':
         evt = metric_map.get(metric)
         if evt is None:
             raise ValueError("Unsupported metric")
-        events = events_df[(events_df['event_type'] == evt) & (events_df['event_date'] >= start)].copy()
-        events['week'] = events['event_date'].dt.to_period('W').apply(lambda r: r.start_time)
-        series = events.groupby('week')['user_id'].nunique().rename('value')
-
-    ts = series.reset_index().sort_values('week')
-    ts['pct_change'] = ts['value'].pct_change().fillna(0).apply(lambda x: round(x * 100, 2))
-    ts = ts.rename(columns={'week': 'week_start'})
-
-    if ts.empty:
-        # Return empty DataFrame with expected columns
-        return pd.DataFrame(columns=['week_start', 'value', 'pct_change'])
-    
-    idx = pd.date_range(start=ts['week_start'].min(), end=ts['week_start'].max(), freq='7D')
-    ts = ts.set_index('week_start').reindex(idx, fill_value=0).rename_axis('week_start').reset_index()
-    return ts
+        events = events.filter(pl.col('event_type') == evt)
+
+    ts = (
+        events.select(pl.col('event_date').dt.truncate('1w').alias('week'), 'user_id')
+        .unique()
+        .group_by('week')
+        .len(name='value')
+        .sort('week')
+        .to_pandas()
+    )
+    ts['pct_change'] = (ts['value'].pct_change().fillna(0) * 100).round(2)
+    # Sparse: weeks with no events are omitted rather than densified to zero rows
+    return ts.rename(columns={'week': 'week_start'})
 
 # -----------------------------
 # Plan-wise metrics
 # -----------------------------
-def compute_plan_metrics(users_df: pd.DataFrame, events_df: pd.DataFrame, plans_df: pd.DataFrame) -> pd.DataFrame:
-    paid_events = events_df[events_df['event_type'] == 'paid'].copy()
-    merged = users_df.merge(paid_events[['user_id']], on='user_id', how='inner')
-    merged = merged.merge(plans_df, on='plan_id', how='left')
-
-    plan_metrics = merged.groupby('plan_name').agg(
-        paid_users=('user_id', 'nunique'),
-        mrr=('price', 'sum'),
-        avg_revenue_per_user=('price', 'mean')
-    ).reset_index()
+def compute_plan_metrics(paid_users_df: pd.DataFrame, plans_df: pd.DataFrame) -> pd.DataFrame:
+    # Project to the join/agg columns so the merge only carries what the groupby reads
+    plan_metrics = (
+        paid_users_df[['user_id', 'plan_id']]
+        .merge(plans_df[['plan_id', 'plan_name', 'price']], on='plan_id', how='left', sort=False)
+        .groupby('plan_name', observed=True)
+        .agg(
+            paid_users=('user_id', 'size'),  # paid_users_df has one row per user
+            mrr=('price', 'sum'),
+            avg_revenue_per_user=('price', 'mean')
+        )
+        .reset_index()
+    )
     return plan_metrics
 
 # -----------------------------
 # Traffic source metrics
 # -----------------------------
-def compute_source_metrics(users_df: pd.DataFrame, events_df: pd.DataFrame, sources_df: pd.DataFrame) -> pd.DataFrame:
-    paid_events = events_df[events_df['event_type'] == 'paid'].copy()
-    merged = users_df.merge(paid_events[['user_id']], on='user_id', how='inner')
-    merged = merged.merge(sources_df, on='source_id', how='left')
-
-    source_metrics = merged.groupby('source_name').agg(
-        paid_users=('user_id', 'nunique')
-    ).reset_index()
+def compute_source_metrics(paid_users_df: pd.DataFrame, sources_df: pd.DataFrame) -> pd.DataFrame:
+    source_metrics = (
+        paid_users_df[['user_id', 'source_id']]
+        .merge(sources_df[['source_id', 'source_name']], on='source_id', how='left', sort=False)
+        .groupby('source_name', observed=True)
+        .agg(paid_users=('user_id', 'size'))  # paid_users_df has one row per user
+        .reset_index()
+    )
     return source_metrics
 
 # -----------------------------
-# Runner
+# Data loading
 # -----------------------------
-def run_all_metrics() -> Dict[str, pd.DataFrame]:
-    conn = create_connection()
-    if not conn:
-        raise RuntimeError("DB connection failed")
-    try:
-        raw = fetch_raw_data(conn)
-        users, events, plans, sources = raw['users'], raw['events'], raw['plans'], raw['sources']
-
-        funnel_df = compute_funnel(events)
-        revenue_dict = compute_revenue_metrics(users, events, plans)
-        cohort_df = compute_cohort_retention(users, events)
-        weekly_growth_df = compute_weekly_growth(users, events, metric='signups')
-        plan_metrics_df = compute_plan_metrics(users, events, plans)
-        source_metrics_df = compute_source_metrics(users, events, sources)
-
-        return {
-            'funnel': funnel_df,
-            'revenue': revenue_dict,
-            'cohort': cohort_df,
-            'weekly_growth': weekly_growth_df,
-            'plan_metrics': plan_metrics_df,
-            'source_metrics': source_metrics_df
-        }
-    finally:
-        close_connection(conn)
+def _frames_digest(frames) -> tuple:
+    """Content hash of DataFrames, for callers that have no cheaper source key"""
+    return tuple((df.shape, int(pd.util.hash_pandas_object(df, index=True).sum())) for df in frames)
+
+def _prepare_tables(users: pd.DataFrame,
+                    events: pd.DataFrame,
+                    plans: pd.DataFrame,
+                    sources: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Raw tables plus the shared event slices and paid users the metrics are computed from"""
+    prepared = _prepare_events(events)
+    return {
+        'users': users,
+        'events': prepared['events'],
+        'plans': plans,
+        'sources': sources,
+        'paid_events': prepared['paid_events'],
+        'signup_events': prepared['signup_events'],
+        'paid_users': compute_paid_users(users, prepared['paid_user_ids']),
+    }
 
-# -----------------------------
-# Runner: CSV Uploads
-# -----------------------------
-def run_all_metrics_from_csv(data_dict: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+@st.cache_data(ttl=300)
+def load_data(lookback_days: Optional[int] = None) -> Dict[str, object]:
     """
-    Compute all metrics from uploaded CSV files.
+    Fetch and prepare the MySQL tables for the given filters.
+    Besides the frames, 'as_of' is the day the lookback was applied from, and 'key'
+    identifies this load (its fetch time) for the metric caches.
+    """
+    as_of = today_utc()
+    raw = fetch_raw_data(get_db_uri(), lookback_days, as_of)
+    data = _prepare_tables(raw['users'], raw['events'], raw['plans'], raw['sources'])
+    data.update(as_of=as_of, key=('mysql', lookback_days, datetime.utcnow()))
+    return data
+
+def load_data_from_csv(data_dict: Dict[str, pd.DataFrame],
+                       lookback_days: Optional[int] = None,
+                       source_key: Optional[object] = None) -> Dict[str, object]:
+    """
+    Filter and prepare uploaded CSV tables.
     data_dict keys: 'users', 'events', 'plans', 'sources' -> pd.DataFrame
+    Frames are expected already typed by the reader (parsed dates, encode_labels applied).
+    source_key identifies the uploaded files (e.g. a digest of their bytes); without one
+    the frames are content-hashed. Not cached: the parsed frames are cached by the reader
+    and each metric by data['key'].
     """
-    users, events, plans, sources = data_dict['users'], data_dict['events'], data_dict['plans'], data_dict['sources']
+    as_of = today_utc()
+    users, events = filter_raw_data(data_dict['users'], data_dict['events'], lookback_days, as_of)
+    data = _prepare_tables(users, events, data_dict['plans'], data_dict['sources'])
+    if source_key is None:
+        source_key = _frames_digest(data_dict[k] for k in ('users', 'events', 'plans', 'sources'))
+    data.update(as_of=as_of, key=('csv', source_key, lookback_days, as_of))
+    return data
+
+# -----------------------------
+# Cached per-metric accessors
+# -----------------------------
+# Each metric is cached on the loader's data['key'] (a few scalars) instead of hashing the
+# frames on every rerun; _data is left out of the cache key by its leading underscore.
+# Every reload / lookback gives a new key, so only the most recent entries are kept.
+METRIC_CACHE_ENTRIES = 32
+
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_funnel(data_key: tuple, _data: Dict[str, object]) -> pd.DataFrame:
+    return compute_funnel(_data['events'])
 
-    # After reading the CSVs into DataFrames
-    users['signup_date'] = pd.to_datetime(users['signup_date'], errors='coerce')
-    events['event_date'] = pd.to_datetime(events['event_date'], errors='coerce')
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_revenue(data_key: tuple, _data: Dict[str, object]) -> Dict[str, float]:
+    return compute_revenue_metrics(_data['users'], _data['paid_events'], _data['plans'], _data['paid_users'],
+                                   as_of_date=_data['as_of'])
 
-    # Core metrics
-    funnel_df = compute_funnel(events)
-    revenue_dict = compute_revenue_metrics(users, events, plans)
-    cohort_df = compute_cohort_retention(users, events)
-    weekly_growth_df = compute_weekly_growth(users, events, metric='signups')
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_cohort(data_key: tuple, _data: Dict[str, object]) -> pd.DataFrame:
+    return compute_cohort_retention(_data['users'], _data['events'])
 
-    # New metrics
-    plan_metrics_df = compute_plan_metrics(users, events, plans)
-    source_metrics_df = compute_source_metrics(users, events, sources)
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_weekly_growth(data_key: tuple, _data: Dict[str, object]) -> pd.DataFrame:
+    return compute_weekly_growth(_data['users'], _data['signup_events'], metric='signups',
+                                 as_of_date=_data['as_of'])
 
-    
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_plan_metrics(data_key: tuple, _data: Dict[str, object]) -> pd.DataFrame:
+    return compute_plan_metrics(_data['paid_users'], _data['plans'])
 
+@st.cache_data(max_entries=METRIC_CACHE_ENTRIES)
+def get_source_metrics(data_key: tuple, _data: Dict[str, object]) -> pd.DataFrame:
+    return compute_source_metrics(_data['paid_users'], _data['sources'])
 
+# -----------------------------
+# Runners
+# -----------------------------
+def _all_metrics(data: Dict[str, object]) -> Dict[str, pd.DataFrame]:
+    key = data['key']
     return {
-        'funnel': funnel_df,
-        'revenue': revenue_dict,
-        'cohort': cohort_df,
-        'weekly_growth': weekly_growth_df,
-        'plan_metrics': plan_metrics_df,
-        'source_metrics': source_metrics_df
-    }        
+        'funnel': get_funnel(key, data),
+        'revenue': get_revenue(key, data),
+        'cohort': get_cohort(key, data),
+        'weekly_growth': get_weekly_growth(key, data),
+        'plan_metrics': get_plan_metrics(key, data),
+        'source_metrics': get_source_metrics(key, data)
+    }
+
+def run_all_metrics(lookback_days: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Compute every metric from MySQL (the dashboard computes them per tab instead)"""
+    return _all_metrics(load_data(lookback_days))
+
+def run_all_metrics_from_csv(data_dict: Dict[str, pd.DataFrame],
+                             lookback_days: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Compute every metric from uploaded CSV tables (see load_data_from_csv for data_dict)"""
+    return _all_metrics(load_data_from_csv(data_dict, lookback_days))
 
 # -----------------------------
 # Test runner
@@ -1,33 +1,29 @@
-import mysql.connector
-from mysql.connector import Error
+from urllib.parse import quote
 
-def create_connection():
-    """
-    Creates and returns a MySQL database connection.
-    """
-    try:
-        connection = mysql.connector.connect(
-            host="127.0.0.1",
-            user="root",          # replace with your MySQL username
-            password="",  # replace with your MySQL password
-            database="saas_funnel"
-        )
-        if connection.is_connected():
-            print("Connected to MySQL database")
-            return connection
-    except Error as e:
-        print(f"Error: '{e}'")
-        return None
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "root",          # replace with your MySQL username
+    "password": "",  # replace with your MySQL password
+    "database": "saas_funnel",
+}
 
-def close_connection(connection):
+def get_db_uri() -> str:
     """
-    Closes the MySQL database connection.
+    Connection URI for Arrow-native readers (connectorx), built from DB_CONFIG.
+    User and password are percent-encoded so characters like '@', ':' or '/' are safe.
     """
-    if connection and connection.is_connected():
-        connection.close()
-        print("MySQL connection closed")
+    return "mysql://{user}:{password}@{host}/{database}".format(
+        user=quote(DB_CONFIG["user"], safe=""),
+        password=quote(DB_CONFIG["password"], safe=""),
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["database"],
+    )
 
 if __name__ == "__main__":
-    conn = create_connection()
-    if conn:
-        close_connection(conn)
+    import connectorx as cx
+
+    try:
+        cx.read_sql(get_db_uri(), "SELECT 1")
+        print("Connected to MySQL database")
+    except Exception as e:
+        print(f"Error: '{e}'")
@@ -1,7 +1,6 @@
 import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 # -----------------------------
 # Paths
@@ -15,7 +14,7 @@ os.makedirs(data_dir, exist_ok=True)
 n_users = 100
 users = pd.DataFrame({
     "user_id": range(1, n_users+1),
-    "signup_date": [datetime(2025,1,1) + timedelta(days=np.random.randint(0, 100)) for _ in range(n_users)],
+    "signup_date": np.datetime64('2025-01-01') + np.random.randint(0, 100, size=n_users).astype('timedelta64[D]'),
     "plan_id": np.random.randint(1, 4, size=n_users),
     "source_id": np.random.randint(1, 5, size=n_users)
 })
@@ -43,11 +42,12 @@ sources.to_csv(os.path.join(data_dir, "Sources.csv"), index=False)
 # -----------------------------
 # Generate dummy Events.csv
 # -----------------------------
+n_events = 300
 event_types = ['visit','signup','trial','paid']
 events = pd.DataFrame({
-    "user_id": np.random.choice(users['user_id'], 300),
-    "event_type": np.random.choice(event_types, 300),
-    "event_date": [datetime(2025,1,1) + timedelta(days=np.random.randint(0, 100)) for _ in range(300)]
+    "user_id": np.random.randint(1, n_users+1, size=n_events),
+    "event_type": np.random.choice(event_types, n_events),
+    "event_date": np.datetime64('2025-01-01') + np.random.randint(0, 100, size=n_events).astype('timedelta64[D]')
 })
 events.to_csv(os.path.join(data_dir, "Events.csv"), index=False)
 